@@ -1,49 +1,178 @@
+import asyncio
+import atexit
+import itertools
+import json
+import logging
 import os
-import requests
 import sys
-from typing import Dict, List, TypedDict
-
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple, Type, TypedDict
+from urllib.parse import urlsplit
+
+import httpx
+from cachetools import TTLCache
 from dotenv import load_dotenv
-from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, convert_to_openai_messages
 from langchain_openai import ChatOpenAI
 from langgraph.graph import END, StateGraph
+from openai import AsyncOpenAI, pydantic_function_tool
 from pydantic import BaseModel, Field
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+
+# Bound output size and request time so worst-case latency stays predictable;
+# the synthesis call gets a larger output budget than the other calls
+LLM = ChatOpenAI(model="gpt-4o", temperature=0, max_tokens=800, timeout=30, max_retries=2)
+LLM_SYNTH = ChatOpenAI(model="gpt-4o", temperature=0, max_tokens=1200, timeout=30, max_retries=2)
+
+
+class SearchResult(NamedTuple):
+    title: str
+    url: str
+    content: str
 
-LLM = ChatOpenAI(model="gpt-4o", temperature=0)
+
+def _is_retryable(exc: BaseException) -> bool:
+    # Timeouts, connection errors, rate limiting and 5xx are worth another try; other 4xx are not
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return isinstance(exc, (httpx.TransportError, asyncio.TimeoutError))
+
+
+_serper_retry = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=0.2, max=2),
+    retry=retry_if_exception(_is_retryable),
+    reraise=True,
+)
 
 
 class SerperSearchTool:
     ENDPOINT = "https://google.serper.dev/search"
+    TIMEOUT = 4.0  # per attempt; failed attempts are retried
+    DEADLINE = 6.0  # per query across all attempts, from when its first attempt gets a slot
+    MAX_CONCURRENCY = 8  # in-flight requests per event loop, to stay under Serper's rate limit
 
-    def __init__(self, k: int = 10):
+    def __init__(self, k: int = 10, cache_ttl: int = 3600):
         self.k = k
         key = os.getenv("SERPER_API_KEY")
         if not key:
             raise ValueError("SERPER_API_KEY is not set in environment")
         self.headers = {"X-API-KEY": key, "Content-Type": "application/json"}
-
-    def invoke(self, query: str) -> List[Dict]:
-        payload = {"q": query, "num": self.k}
-        resp = requests.post(self.ENDPOINT, headers=self.headers, json=payload, timeout=10)
+        self._cache = TTLCache(maxsize=1024, ttl=cache_ttl)
+        self._cache_lock = threading.Lock()
+        # The sync client is only opened on the first invoke(); the graph searches via ainvoke()
+        self._http: Optional[httpx.Client] = None
+        self._http_lock = threading.Lock()
+        # httpx.AsyncClient is bound to the loop it first runs on, so keep one per loop
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def invoke(self, query: str) -> List[SearchResult]:
+        cached = self._cached(query)
+        if cached is not None:
+            return cached
+
+        return self._store(query, self._normalise(self._fetch(query)))
+
+    async def ainvoke(self, query: str) -> List[SearchResult]:
+        cached = self._cached(query)
+        if cached is not None:
+            return cached
+
+        return self._store(query, self._normalise(await self._afetch_with_deadline(query)))
+
+    @_serper_retry
+    def _fetch(self, query: str) -> Dict:
+        resp = self._sync_client().post(self.ENDPOINT, json={"q": query, "num": self.k})
         resp.raise_for_status()
-        data = resp.json()
-
-        results: List[Dict] = []
-        for item in data.get("organic", [])[: self.k]:
-            results.append(
-                {
-                    "title": item.get("title"),
-                    "url": item.get("link"),
-                    "content": item.get("snippet"),
-                }
+        return resp.json()
+
+    async def _afetch_with_deadline(self, query: str) -> Dict:
+        # Bound the retried call as a whole so one stalled query can't hold up the batch,
+        # but start the clock only once it first gets a slot; queueing doesn't count
+        first_slot = asyncio.get_running_loop().create_future()
+        fetch = asyncio.ensure_future(self._afetch(query, first_slot))
+        try:
+            await asyncio.wait({first_slot, fetch}, return_when=asyncio.FIRST_COMPLETED)
+            return await asyncio.wait_for(fetch, timeout=self.DEADLINE)
+        finally:
+            fetch.cancel()
+
+    @_serper_retry
+    async def _afetch(self, query: str, first_slot: asyncio.Future) -> Dict:
+        # Only the request itself holds a slot, so retry backoff doesn't block other queries.
+        # The attempt is timed from when it gets a slot, so time spent queued doesn't count.
+        async with self._semaphore():
+            if not first_slot.done():
+                first_slot.set_result(None)
+            resp = await asyncio.wait_for(
+                self._async_client().post(self.ENDPOINT, json={"q": query, "num": self.k}),
+                timeout=self.TIMEOUT,
             )
+        resp.raise_for_status()
+        return resp.json()
+
+    def _sync_client(self) -> httpx.Client:
+        # Pooled keep-alive connections so only the first request pays the TLS handshake
+        with self._http_lock:
+            if self._http is None:
+                self._http = httpx.Client(http2=True, timeout=self.TIMEOUT, headers=self.headers)
+                atexit.register(self._http.close)
+            return self._http
+
+    async def aclose(self) -> None:
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def _async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                http2=True,
+                timeout=self.TIMEOUT,
+                headers=self.headers,
+                limits=httpx.Limits(max_keepalive_connections=20),
+            )
+            self._async_clients[loop] = client
+        return client
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Like the clients, asyncio primitives can't be shared across event loops
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    def _cached(self, query: str) -> Optional[List[SearchResult]]:
+        with self._cache_lock:
+            return self._cache.get((query, self.k))
+
+    def _store(self, query: str, results: List[SearchResult]) -> List[SearchResult]:
+        with self._cache_lock:
+            self._cache[(query, self.k)] = results
         return results
 
+    def _normalise(self, data: Dict) -> List[SearchResult]:
+        return [
+            SearchResult(item.get("title"), item.get("link"), item.get("snippet"))
+            for item in data.get("organic", ())[: self.k]
+        ]
+
+
+MAX_SEARCH_QUERIES = 5
+MAX_SNIPPET_CHARS = 400
 
 search_tool = SerperSearchTool(k=10)
 
@@ -51,11 +180,12 @@ search_tool = SerperSearchTool(k=10)
 class ResearchState(TypedDict, total=False):
     user_query: str
     search_queries: List[str]
-    search_results: List[Dict]
+    search_results: List[SearchResult]
     research_summary: str
     follow_up_questions: List[str]
     current_step: str
     errors: List[str]
+    search_warnings: List[str]
 
 
 class SearchQuery(BaseModel):
@@ -67,112 +197,151 @@ class SearchQueries(BaseModel):
     queries: List[SearchQuery]
 
 
-class ResearchSummary(BaseModel):
+class FollowUpQuestion(BaseModel):
+    question: str
+    rationale: str
+
+
+class SynthesisWithFollowups(BaseModel):
     summary: str
     key_insights: List[str]
     sources_consulted: List[str]
+    follow_up_questions: List[FollowUpQuestion]
 
 
-class FollowUpQuestion(BaseModel):
-    question: str
-    rationale: str
+# Prompts and structured-output runnables are constant, so build them once at import
+_QUERY_SYS = SystemMessage(content=(
+    "You break down research questions into 3‑5 diverse, precise web‑search "
+    "queries. Cover different angles of the topic."
+))
+_QUERY_LLM = LLM.with_structured_output(SearchQueries)
 
+_SYNTH_SYS = SystemMessage(content=(
+    "You synthesise multiple sources into a clear answer, citing them by their [n] number. "
+    "Highlight key insights. Then suggest 2‑3 thoughtful follow‑up questions "
+    "that would deepen the user's understanding or cover uncovered aspects."
+))
+_SYNTH_LLM = LLM_SYNTH.with_structured_output(SynthesisWithFollowups, method="function_calling")
 
-class FollowUpQuestions(BaseModel):
-    questions: List[FollowUpQuestion]
 
+def _query_messages(question: str) -> List[BaseMessage]:
+    return [_QUERY_SYS, HumanMessage(content=f"User question: {question}")]
 
-def query_analyser(state: ResearchState) -> ResearchState:
-    sys = (
-        "You break down research questions into 3‑5 diverse, precise web‑search "
-        "queries. Cover different angles of the topic."
-    )
-    parser = PydanticOutputParser(pydantic_object=SearchQueries)
 
-    prompt = (
-        f"User question: {state['user_query']}\n\n"
-        f"{parser.get_format_instructions()}"
-    )
+def _search_queries(result: SearchQueries) -> List[str]:
+    return [q.query for q in result.queries[:MAX_SEARCH_QUERIES]]
 
-    msg = [SystemMessage(content=sys), HumanMessage(content=prompt)]
+
+def query_analyser(state: ResearchState) -> ResearchState:
+    msg = _query_messages(state["user_query"])
     try:
-        resp = LLM.invoke(msg)
-        queries = parser.parse(resp.content).queries
-        return {**state, "search_queries": [q.query for q in queries], "current_step": "search_executor"}
+        return {"search_queries": _search_queries(_QUERY_LLM.invoke(msg)), "current_step": "search_executor"}
     except Exception as e:
-        return {**state, "errors": state.get("errors", []) + [f"query_analyser: {e}"], "current_step": "error"}
+        return {"errors": state.get("errors", []) + [f"query_analyser: {e}"], "current_step": "error"}
+
+
+def _dedupe_results(results_lists: List[List[SearchResult]]) -> List[SearchResult]:
+    """Flatten per-query results, keeping the first hit for each normalised URL (URL-less hits are all kept)."""
+    seen = set()
+    unique: List[SearchResult] = []
+    for r in itertools.chain.from_iterable(results_lists):
+        if not r.url:
+            unique.append(r)
+            continue
+        parts = urlsplit(r.url)
+        key = (parts.netloc.lower(), parts.path.rstrip("/"), parts.query)
+        if key not in seen:
+            seen.add(key)
+            unique.append(r)
+    return unique
+
+
+def _drop_failed_searches(
+    queries: List[str], outcomes: List[object]
+) -> Tuple[List[List[SearchResult]], List[str]]:
+    """Replace failed or timed-out searches with empty results plus a warning each;
+    raise only if every one failed."""
+    failures = [o for o in outcomes if isinstance(o, BaseException)]
+    if failures and len(failures) == len(outcomes):
+        raise RuntimeError(f"all {len(queries)} searches failed; first error: {failures[0]!r}") from failures[0]
+    results_lists: List[List[SearchResult]] = []
+    warnings: List[str] = []
+    for q, outcome in zip(queries, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.warning("Search failed for %r: %r", q, outcome)
+            warnings.append(f"search failed for {q!r}: {outcome!r}")
+            results_lists.append([])
+        else:
+            results_lists.append(outcome)
+    return results_lists, warnings
+
+
+async def _run_searches(queries: List[str]) -> Tuple[List[List[SearchResult]], List[str]]:
+    if not queries:
+        raise ValueError("no search queries to run")
+    outcomes = await asyncio.gather(
+        *[search_tool.ainvoke(q) for q in queries],
+        return_exceptions=True,
+    )
+    return _drop_failed_searches(queries, outcomes)
 
 
 def search_executor(state: ResearchState) -> ResearchState:
+    async def run_on_private_loop() -> Tuple[List[List[SearchResult]], List[str]]:
+        try:
+            return await _run_searches(state.get("search_queries", []))
+        finally:
+            # asyncio.run() gives every call a fresh loop, so don't leave its client behind
+            await search_tool.aclose()
+
     try:
-        results: List[Dict] = []
-        for q in state["search_queries"]:
-            results.extend(search_tool.invoke(q))
-        return {**state, "search_results": results, "current_step": "content_synthesiser"}
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            results_lists, warnings = asyncio.run(run_on_private_loop())
+        else:
+            # Called from async code (Jupyter, a web handler): asyncio.run() can't nest,
+            # so give the searches their own loop on a worker thread
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                results_lists, warnings = pool.submit(lambda: asyncio.run(run_on_private_loop())).result()
+        results = _dedupe_results(results_lists)
+        return {"search_results": results, "search_warnings": warnings, "current_step": "synthesise_and_followup"}
     except Exception as e:
-        return {**state, "errors": state.get("errors", []) + [f"search_executor: {e}"], "current_step": "error"}
+        return {"errors": state.get("errors", []) + [f"search_executor: {e}"], "current_step": "error"}
 
 
-def content_synthesiser(state: ResearchState) -> ResearchState:
-    sys = (
-        "You synthesise multiple sources into a clear, cited answer. "
-        "Highlight key insights."
-    )
-    parser = PydanticOutputParser(pydantic_object=ResearchSummary)
-
+def _synthesis_messages(question: str, sources: List[SearchResult]) -> List[BaseMessage]:
+    # One compact line per source; URLs go in a separate trailing list
     formatted = "\n".join(
-        f"Source {i+1}: {r['title']}\nURL: {r['url']}\nContent: {r['content']}\n"
-        for i, r in enumerate(state["search_results"])
+        f"[{i}] {r.title}: {(r.content or '')[:MAX_SNIPPET_CHARS]}"
+        for i, r in enumerate(sources, 1)
     )
+    urls = "\n".join(f"[{i}] {r.url}" for i, r in enumerate(sources, 1))
 
     prompt = (
-        f"User question: {state['user_query']}\n\n"
+        f"User question: {question}\n\n"
         f"Search results:\n{formatted}\n\n"
-        f"{parser.get_format_instructions()}"
+        f"URLS:\n{urls}"
     )
+    return [_SYNTH_SYS, HumanMessage(content=prompt)]
 
-    msg = [SystemMessage(content=sys), HumanMessage(content=prompt)]
-    try:
-        resp = LLM.invoke(msg)
-        summary = parser.parse(resp.content)
-        return {
-            **state,
-            "research_summary": summary.summary,
-            "current_step": "follow_up_generator",
-        }
-    except Exception as e:
-        return {**state, "errors": state.get("errors", []) + [f"content_synthesiser: {e}"], "current_step": "error"}
 
-
-def follow_up_generator(state: ResearchState) -> ResearchState:
-    sys = (
-        "Generate 2‑3 thoughtful follow‑up questions that would deepen the user's "
-        "understanding or cover uncovered aspects."
-    )
-    parser = PydanticOutputParser(pydantic_object=FollowUpQuestions)
-
-    prompt = (
-        f"Original question: {state['user_query']}\n\n"
-        f"Research summary: {state['research_summary']}\n\n"
-        f"{parser.get_format_instructions()}"
-    )
-
-    msg = [SystemMessage(content=sys), HumanMessage(content=prompt)]
+def synthesise_and_followup(state: ResearchState) -> ResearchState:
+    msg = _synthesis_messages(state["user_query"], state["search_results"])
     try:
-        resp = LLM.invoke(msg)
-        questions = parser.parse(resp.content).questions
+        result = _SYNTH_LLM.invoke(msg)
         return {
-            **state,
-            "follow_up_questions": [q.question for q in questions],
+            "research_summary": result.summary,
+            "follow_up_questions": [q.question for q in result.follow_up_questions],
             "current_step": "complete",
         }
     except Exception as e:
-        return {**state, "errors": state.get("errors", []) + [f"follow_up_generator: {e}"], "current_step": "error"}
+        return {"errors": state.get("errors", []) + [f"synthesise_and_followup: {e}"], "current_step": "error"}
 
 
 def error_handler(state: ResearchState) -> ResearchState:
-    print("Error(s) encountered:", *state.get("errors", []), sep="\n  – ")
-    return {**state, "current_step": "complete"}
+    logger.warning("Error(s) encountered: %s", "; ".join(state.get("errors", [])))
+    return {"current_step": "complete"}
 
 
 def build_graph():
@@ -180,8 +349,7 @@ def build_graph():
 
     g.add_node("query_analyser", query_analyser)
     g.add_node("search_executor", search_executor)
-    g.add_node("content_synthesiser", content_synthesiser)
-    g.add_node("follow_up_generator", follow_up_generator)
+    g.add_node("synthesise_and_followup", synthesise_and_followup)
     g.add_node("error", error_handler)
 
     g.add_conditional_edges("query_analyser", lambda s: s["current_step"], {
@@ -189,14 +357,10 @@ def build_graph():
         "error": "error",
     })
     g.add_conditional_edges("search_executor", lambda s: s["current_step"], {
-        "content_synthesiser": "content_synthesiser",
-        "error": "error",
-    })
-    g.add_conditional_edges("content_synthesiser", lambda s: s["current_step"], {
-        "follow_up_generator": "follow_up_generator",
+        "synthesise_and_followup": "synthesise_and_followup",
         "error": "error",
     })
-    g.add_conditional_edges("follow_up_generator", lambda s: s["current_step"], {
+    g.add_conditional_edges("synthesise_and_followup", lambda s: s["current_step"], {
         "complete": END,
         "error": "error",
     })
@@ -206,8 +370,18 @@ def build_graph():
     return g.compile()
 
 
-def run_research_workflow(question: str) -> Dict:
-    initial_state: ResearchState = {
+# The graph is static; compile it once. A compiled graph keeps no per-run
+# state, so concurrent invocations can share it safely.
+_COMPILED_GRAPH = build_graph()
+
+
+# Whole-workflow results keyed by normalised question, so repeat questions skip the graph
+_WORKFLOW_CACHE = TTLCache(maxsize=256, ttl=6 * 3600)
+_WORKFLOW_CACHE_LOCK = threading.Lock()
+
+
+def _initial_state(question: str) -> ResearchState:
+    return {
         "user_query": question,
         "search_queries": [],
         "search_results": [],
@@ -215,28 +389,205 @@ def run_research_workflow(question: str) -> Dict:
         "follow_up_questions": [],
         "current_step": "query_analyser",
         "errors": [],
+        "search_warnings": [],
     }
 
-    wf = build_graph()
-
-    # Stream progress
-    for update in wf.stream(initial_state, stream_mode="updates"):
-        for node_name in update:
-            print(f"processed: {node_name}")
-
-    # Final state
-    final_state = wf.invoke(initial_state)
 
+def _to_result(state: ResearchState) -> Dict:
     return {
-        "original_query": final_state["user_query"],
-        "search_queries": final_state["search_queries"],
-        "research_summary": final_state["research_summary"],
-        "follow_up_questions": final_state["follow_up_questions"],
-        "errors": final_state["errors"],
+        "original_query": state["user_query"],
+        "search_queries": state["search_queries"],
+        "research_summary": state["research_summary"],
+        "follow_up_questions": state["follow_up_questions"],
+        "errors": state["errors"],
+        "search_warnings": state["search_warnings"],
     }
 
 
+def run_research_workflow(question: str) -> Dict:
+    cache_key = question.strip().lower()
+    with _WORKFLOW_CACHE_LOCK:
+        cached = _WORKFLOW_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    initial_state = _initial_state(question)
+
+    wf = _COMPILED_GRAPH
+
+    # Stream progress and keep the last full state, so the graph only runs once
+    final_state = initial_state
+    for mode, chunk in wf.stream(initial_state, stream_mode=["updates", "values"]):
+        if mode == "updates":
+            for node_name in chunk:
+                logger.info("processed: %s", node_name)
+        else:
+            final_state = chunk
+
+    result = _to_result(final_state)
+    if not result["errors"] and not result["search_warnings"]:
+        with _WORKFLOW_CACHE_LOCK:
+            _WORKFLOW_CACHE[cache_key] = result
+    return result
+
+
+def _parse_batch_row(schema: Type[BaseModel], row: Dict) -> object:
+    try:
+        error = row.get("error")
+        if error:
+            message = error.get("message", error) if isinstance(error, dict) else error
+            raise RuntimeError(f"batch request failed: {message}")
+        response = row["response"]
+        if response["status_code"] != 200:
+            error = (response.get("body") or {}).get("error") or {}
+            raise RuntimeError(
+                f"batch request failed with HTTP {response['status_code']}: "
+                f"{error.get('message', 'no error message')}"
+            )
+        message = response["body"]["choices"][0]["message"]
+        return schema.model_validate_json(message["tool_calls"][0]["function"]["arguments"])
+    except Exception as e:
+        return e
+
+
+BATCH_POLL_SECONDS = 30
+
+
+async def _openai_batch(
+    model: ChatOpenAI, schema: Type[BaseModel], message_lists: List[List[BaseMessage]]
+) -> List[object]:
+    """Run one structured-output request per message list through the OpenAI Batch API.
+
+    Returns a parsed `schema` instance or an exception per input, in input order.
+    """
+    client = AsyncOpenAI()
+    tool = pydantic_function_tool(schema)
+    tool_choice = {"type": "function", "function": {"name": tool["function"]["name"]}}
+    lines = [
+        json.dumps({
+            "custom_id": str(i),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": model.model_name,
+                "temperature": model.temperature,
+                "max_tokens": model.max_tokens,
+                "messages": convert_to_openai_messages(messages),
+                "tools": [tool],
+                "tool_choice": tool_choice,
+            },
+        })
+        for i, messages in enumerate(message_lists)
+    ]
+    batch_file = await client.files.create(
+        file=("research_batch.jsonl", "\n".join(lines).encode()), purpose="batch"
+    )
+    batch = await client.batches.create(
+        input_file_id=batch_file.id, endpoint="/v1/chat/completions", completion_window="24h"
+    )
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        await asyncio.sleep(BATCH_POLL_SECONDS)
+        batch = await client.batches.retrieve(batch.id)
+    logger.info("batch %s finished with status %s", batch.id, batch.status)
+
+    # Successful requests land in the output file and failed ones in the error file;
+    # the placeholder is only left for inputs that appear in neither
+    outputs: List[object] = [
+        RuntimeError(f"batch {batch.id} {batch.status} without a result for this request")
+    ] * len(message_lists)
+    for file_id in (batch.output_file_id, batch.error_file_id):
+        if not file_id:
+            continue
+        content = await client.files.content(file_id)
+        for line in content.text.splitlines():
+            row = json.loads(line)
+            outputs[int(row["custom_id"])] = _parse_batch_row(schema, row)
+    return outputs
+
+
+async def run_many(questions: List[str], use_batch_api: bool = False) -> List[Dict]:
+    """Research several questions together, batching each LLM stage across them.
+
+    Stages are run with `abatch`, so the LLM calls for all questions go out
+    concurrently. With `use_batch_api` they go through the OpenAI Batch API
+    instead: half the cost, but a batch may take up to 24h, so it only suits
+    offline jobs. That path sends both stages as forced tool calls, whereas
+    the query stage otherwise uses json_schema structured output. Repeated
+    questions are researched once. Results come back in input order, in the
+    same shape as `run_research_workflow`.
+    """
+    cache_keys = [q.strip().lower() for q in questions]
+    with _WORKFLOW_CACHE_LOCK:
+        done = {key: _WORKFLOW_CACHE.get(key) for key in cache_keys}
+    # Research each uncached question once, from its first occurrence, however often it repeats
+    first_index: Dict[str, int] = {}
+    for i, key in enumerate(cache_keys):
+        first_index.setdefault(key, i)
+    pending = [i for key, i in first_index.items() if done[key] is None]
+    states: Dict[int, ResearchState] = {i: _initial_state(questions[i]) for i in pending}
+
+    async def run_stage(
+        model: ChatOpenAI, schema: Type[BaseModel], llm, message_lists: List[List[BaseMessage]]
+    ) -> List[object]:
+        if not message_lists:
+            return []
+        if use_batch_api:
+            return await _openai_batch(model, schema, message_lists)
+        return await llm.abatch(message_lists, return_exceptions=True)
+
+    # Step 1: search queries for every question
+    outputs = await run_stage(
+        LLM,
+        SearchQueries,
+        _QUERY_LLM,
+        [_query_messages(questions[i]) for i in pending],
+    )
+    for i, out in zip(pending, outputs):
+        if isinstance(out, Exception):
+            states[i]["errors"].append(f"query_analyser: {out}")
+        else:
+            states[i]["search_queries"] = _search_queries(out)
+    pending = [i for i in pending if not states[i]["errors"]]
+
+    # Step 2: every question's searches concurrently, but failing per question
+    outcomes = await asyncio.gather(
+        *[_run_searches(states[i]["search_queries"]) for i in pending],
+        return_exceptions=True,
+    )
+    for i, out in zip(pending, outcomes):
+        if isinstance(out, BaseException):
+            states[i]["errors"].append(f"search_executor: {out}")
+        else:
+            results_lists, states[i]["search_warnings"] = out
+            states[i]["search_results"] = _dedupe_results(results_lists)
+    pending = [i for i in pending if not states[i]["errors"]]
+
+    # Step 3: synthesis and follow-ups for every question
+    outputs = await run_stage(
+        LLM_SYNTH,
+        SynthesisWithFollowups,
+        _SYNTH_LLM,
+        [_synthesis_messages(questions[i], states[i]["search_results"]) for i in pending],
+    )
+    for i, out in zip(pending, outputs):
+        if isinstance(out, Exception):
+            states[i]["errors"].append(f"synthesise_and_followup: {out}")
+        else:
+            states[i]["research_summary"] = out.summary
+            states[i]["follow_up_questions"] = [q.question for q in out.follow_up_questions]
+
+    for i in states:
+        result = _to_result(states[i])
+        if not result["errors"] and not result["search_warnings"]:
+            with _WORKFLOW_CACHE_LOCK:
+                _WORKFLOW_CACHE[cache_keys[i]] = result
+        done[cache_keys[i]] = result
+    return [done[key] for key in cache_keys]
+
+
 if __name__ == "__main__":
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper())
+
     if len(sys.argv) < 2:
         print("Usage: python research_workflow.py <your question>")
         sys.exit(1)
@@ -257,3 +608,7 @@ if __name__ == "__main__":
         print("\nErrors:")
         for e in result["errors"]:
             print("  –", e)
+    if result["search_warnings"]:
+        print("\nSearch Warnings:")
+        for w in result["search_warnings"]:
+            print("  –", w)
@@ -1,49 +1,179 @@
+import asyncio
+import atexit
+import itertools
+import logging
 import os
-import requests
+import threading
+import weakref
 import gradio as gr
-from typing import Dict, List, TypedDict
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Tuple, TypedDict
+from urllib.parse import urlsplit
 
+import httpx
+from cachetools import TTLCache
 from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.utils.json import parse_partial_json
 from langchain_openai import ChatOpenAI
 from langgraph.graph import END, StateGraph
 from pydantic import BaseModel, Field
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential
 
 
 load_dotenv()
 
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "WARNING").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
 
-LLM = ChatOpenAI(model="gpt-4o", temperature=0)
+
+# Bound output size and request time so worst-case latency stays predictable;
+# the synthesis call gets a larger output budget than the other calls
+LLM = ChatOpenAI(model="gpt-4o", temperature=0, max_tokens=800, timeout=30, max_retries=2)
+LLM_SYNTH = ChatOpenAI(model="gpt-4o", temperature=0, max_tokens=1200, timeout=30, max_retries=2)
+
+
+class SearchResult(NamedTuple):
+    title: str
+    url: str
+    content: str
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    # Timeouts, connection errors, rate limiting and 5xx are worth another try; other 4xx are not
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return isinstance(exc, (httpx.TransportError, asyncio.TimeoutError))
+
+
+_serper_retry = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=0.2, max=2),
+    retry=retry_if_exception(_is_retryable),
+    reraise=True,
+)
 
 
 class SerperSearchTool:
     ENDPOINT = "https://google.serper.dev/search"
+    TIMEOUT = 4.0  # per attempt; failed attempts are retried
+    DEADLINE = 6.0  # per query across all attempts, from when its first attempt gets a slot
+    MAX_CONCURRENCY = 8  # in-flight requests per event loop, to stay under Serper's rate limit
 
-    def __init__(self, k: int = 10):
+    def __init__(self, k: int = 10, cache_ttl: int = 3600):
         self.k = k
         key = os.getenv("SERPER_API_KEY")
         if not key:
             raise ValueError("SERPER_API_KEY is not set in environment")
         self.headers = {"X-API-KEY": key, "Content-Type": "application/json"}
-
-    def invoke(self, query: str) -> List[Dict]:
-        payload = {"q": query, "num": self.k}
-        resp = requests.post(self.ENDPOINT, headers=self.headers, json=payload, timeout=10)
+        self._cache = TTLCache(maxsize=1024, ttl=cache_ttl)
+        self._cache_lock = threading.Lock()
+        # The sync client is only opened on the first invoke(); the graph searches via ainvoke()
+        self._http: Optional[httpx.Client] = None
+        self._http_lock = threading.Lock()
+        # httpx.AsyncClient is bound to the loop it first runs on, so keep one per loop
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def invoke(self, query: str) -> List[SearchResult]:
+        cached = self._cached(query)
+        if cached is not None:
+            return cached
+
+        return self._store(query, self._normalise(self._fetch(query)))
+
+    async def ainvoke(self, query: str) -> List[SearchResult]:
+        cached = self._cached(query)
+        if cached is not None:
+            return cached
+
+        return self._store(query, self._normalise(await self._afetch_with_deadline(query)))
+
+    @_serper_retry
+    def _fetch(self, query: str) -> Dict:
+        resp = self._sync_client().post(self.ENDPOINT, json={"q": query, "num": self.k})
+        resp.raise_for_status()
+        return resp.json()
+
+    async def _afetch_with_deadline(self, query: str) -> Dict:
+        # Bound the retried call as a whole so one stalled query can't hold up the batch,
+        # but start the clock only once it first gets a slot; queueing doesn't count
+        first_slot = asyncio.get_running_loop().create_future()
+        fetch = asyncio.ensure_future(self._afetch(query, first_slot))
+        try:
+            await asyncio.wait({first_slot, fetch}, return_when=asyncio.FIRST_COMPLETED)
+            return await asyncio.wait_for(fetch, timeout=self.DEADLINE)
+        finally:
+            fetch.cancel()
+
+    @_serper_retry
+    async def _afetch(self, query: str, first_slot: asyncio.Future) -> Dict:
+        # Only the request itself holds a slot, so retry backoff doesn't block other queries.
+        # The attempt is timed from when it gets a slot, so time spent queued doesn't count.
+        async with self._semaphore():
+            if not first_slot.done():
+                first_slot.set_result(None)
+            resp = await asyncio.wait_for(
+                self._async_client().post(self.ENDPOINT, json={"q": query, "num": self.k}),
+                timeout=self.TIMEOUT,
+            )
         resp.raise_for_status()
-        data = resp.json()
-
-        results: List[Dict] = []
-        for item in data.get("organic", [])[: self.k]:
-            results.append(
-                {
-                    "title": item.get("title"),
-                    "url": item.get("link"),
-                    "content": item.get("snippet"),
-                }
+        return resp.json()
+
+    def _sync_client(self) -> httpx.Client:
+        # Pooled keep-alive connections so only the first request pays the TLS handshake
+        with self._http_lock:
+            if self._http is None:
+                self._http = httpx.Client(http2=True, timeout=self.TIMEOUT, headers=self.headers)
+                atexit.register(self._http.close)
+            return self._http
+
+    async def aclose(self) -> None:
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def _async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                http2=True,
+                timeout=self.TIMEOUT,
+                headers=self.headers,
+                limits=httpx.Limits(max_keepalive_connections=20),
             )
+            self._async_clients[loop] = client
+        return client
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # Like the clients, asyncio primitives can't be shared across event loops
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    def _cached(self, query: str) -> Optional[List[SearchResult]]:
+        with self._cache_lock:
+            return self._cache.get((query, self.k))
+
+    def _store(self, query: str, results: List[SearchResult]) -> List[SearchResult]:
+        with self._cache_lock:
+            self._cache[(query, self.k)] = results
         return results
 
+    def _normalise(self, data: Dict) -> List[SearchResult]:
+        return [
+            SearchResult(item.get("title"), item.get("link"), item.get("snippet"))
+            for item in data.get("organic", ())[: self.k]
+        ]
+
+
+MAX_SNIPPET_CHARS = 400
 
 search_tool = SerperSearchTool(k=5)  # Reduced from 10 to 5 for faster inference
 
@@ -51,11 +181,12 @@ search_tool = SerperSearchTool(k=5)  # Reduced from 10 to 5 for faster inference
 class ResearchState(TypedDict, total=False):
     user_query: str
     search_queries: List[str]
-    search_results: List[Dict]
+    search_results: List[SearchResult]
     research_summary: str
     follow_up_questions: List[str]
     current_step: str
     errors: List[str]
+    search_warnings: List[str]
 
 
 class SearchQuery(BaseModel):
@@ -67,146 +198,164 @@ class SearchQueries(BaseModel):
     queries: List[SearchQuery]
 
 
-class ResearchSummary(BaseModel):
+class FollowUpQuestion(BaseModel):
+    question: str
+    rationale: str
+
+
+class SynthesisWithFollowups(BaseModel):
     summary: str
     key_insights: List[str]
     sources_consulted: List[str]
+    follow_up_questions: List[FollowUpQuestion]
 
 
-class FollowUpQuestion(BaseModel):
-    question: str
-    rationale: str
+# Prompts and structured-output runnables are constant, so build them once at import
+_QUERY_SYS = SystemMessage(content=(
+    "You break down research questions into EXACTLY 3 diverse, precise web-search "
+    "queries. Cover the most important angles of the topic. Keep in mind we are in 2025 , "
+    "so use the latest information and trends. Each query should be concise, "
+    "relevant, and designed to yield useful search results."
+    " Each query should have a rationale explaining its importance."
+    " Do not use 2025 in the query unless it is absolutely necessary."
+))
+_QUERY_LLM = LLM.with_structured_output(SearchQueries)
 
+_SYNTH_SYS = SystemMessage(content=(
+    "You synthesise multiple sources into a clear answer, citing them by their [n] number. "
+    "Highlight key insights. Then suggest EXACTLY 2 thoughtful follow‑up questions "
+    "that would deepen the user's understanding or cover uncovered aspects. Be concise."
+))
+_SYNTH_LLM = LLM_SYNTH.with_structured_output(SynthesisWithFollowups, method="function_calling")
 
-class FollowUpQuestions(BaseModel):
-    questions: List[FollowUpQuestion]
 
-
-def query_analyser(state: ResearchState) -> ResearchState:
-    print("\n🔍 STEP 1: Query Analysis")
-    print(f"   User Query: {state['user_query']}")
-    
-    sys = (
-        "You break down research questions into EXACTLY 3 diverse, precise web-search "
-        "queries. Cover the most important angles of the topic. Keep in mind we are in 2025 , "
-        "so use the latest information and trends. Each query should be concise, "
-        "relevant, and designed to yield useful search results."
-        " Each query should have a rationale explaining its importance."
-        " Do not use 2025 in the query unless it is absolutely necessary."
-    )
-    parser = PydanticOutputParser(pydantic_object=SearchQueries)
+async def query_analyser(state: ResearchState) -> ResearchState:
+    logger.info("🔍 STEP 1: Query Analysis")
+    logger.debug("User Query: %s", state["user_query"])
 
     prompt = (
         f"User question: {state['user_query']}\n\n"
-        f"Generate EXACTLY 3 search queries.\n\n"
-        f"{parser.get_format_instructions()}"
+        f"Generate EXACTLY 3 search queries."
     )
 
-    msg = [SystemMessage(content=sys), HumanMessage(content=prompt)]
+    msg = [_QUERY_SYS, HumanMessage(content=prompt)]
     try:
-        resp = LLM.invoke(msg)
-        queries = parser.parse(resp.content).queries[:3]  # Ensure only 3 queries
-        print(f"   Generated {len(queries)} search queries:")
+        queries = (await _QUERY_LLM.ainvoke(msg)).queries[:3]  # Ensure only 3 queries
+        logger.info("Generated %d search queries", len(queries))
         for i, q in enumerate(queries, 1):
-            print(f"     {i}. {q.query}")
-        return {**state, "search_queries": [q.query for q in queries], "current_step": "search_executor"}
+            logger.debug("  %d. %s", i, q.query)
+        return {"search_queries": [q.query for q in queries], "current_step": "search_executor"}
     except Exception as e:
-        print(f"   ❌ Error: {e}")
-        return {**state, "errors": state.get("errors", []) + [f"query_analyser: {e}"], "current_step": "error"}
+        logger.error("❌ query_analyser failed: %s", e)
+        return {"errors": state.get("errors", []) + [f"query_analyser: {e}"], "current_step": "error"}
+
+
+def _dedupe_results(results_lists: List[List[SearchResult]]) -> List[SearchResult]:
+    """Flatten per-query results, keeping the first hit for each normalised URL (URL-less hits are all kept)."""
+    seen = set()
+    unique: List[SearchResult] = []
+    for r in itertools.chain.from_iterable(results_lists):
+        if not r.url:
+            unique.append(r)
+            continue
+        parts = urlsplit(r.url)
+        key = (parts.netloc.lower(), parts.path.rstrip("/"), parts.query)
+        if key not in seen:
+            seen.add(key)
+            unique.append(r)
+    return unique
+
+
+def _drop_failed_searches(
+    queries: List[str], outcomes: List[object]
+) -> Tuple[List[List[SearchResult]], List[str]]:
+    """Replace failed or timed-out searches with empty results plus a warning each;
+    raise only if every one failed."""
+    failures = [o for o in outcomes if isinstance(o, BaseException)]
+    if failures and len(failures) == len(outcomes):
+        raise RuntimeError(f"all {len(queries)} searches failed; first error: {failures[0]!r}") from failures[0]
+    results_lists: List[List[SearchResult]] = []
+    warnings: List[str] = []
+    for q, outcome in zip(queries, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.warning("Search failed for %r: %r", q, outcome)
+            warnings.append(f"search failed for {q!r}: {outcome!r}")
+            results_lists.append([])
+        else:
+            results_lists.append(outcome)
+    return results_lists, warnings
+
+
+async def _run_searches(queries: List[str]) -> Tuple[List[List[SearchResult]], List[str]]:
+    if not queries:
+        raise ValueError("no search queries to run")
+    # Runs on the app's event loop, so the tool's pooled AsyncClient stays open between requests
+    outcomes = await asyncio.gather(
+        *[search_tool.ainvoke(q) for q in queries],
+        return_exceptions=True,
+    )
+    return _drop_failed_searches(queries, outcomes)
 
 
-def search_executor(state: ResearchState) -> ResearchState:
-    print("\n🌐 STEP 2: Executing Web Searches")
+async def search_executor(state: ResearchState) -> ResearchState:
+    logger.info("🌐 STEP 2: Executing Web Searches")
     try:
-        results: List[Dict] = []
-        for i, q in enumerate(state["search_queries"], 1):
-            print(f"   Searching ({i}/{len(state['search_queries'])}): {q}")
-            search_results = search_tool.invoke(q)
-            results.extend(search_results)
-            print(f"     Found {len(search_results)} results")
+        queries = state.get("search_queries", [])
+        for i, q in enumerate(queries, 1):
+            logger.debug("Searching (%d/%d): %s", i, len(queries), q)
+        results_lists, warnings = await _run_searches(queries)
+        for q, search_results in zip(queries, results_lists):
+            logger.debug("Found %d results for: %s", len(search_results), q)
+        results = _dedupe_results(results_lists)
         
-        print(f"   Total results collected: {len(results)}")
-        return {**state, "search_results": results, "current_step": "content_synthesiser"}
+        logger.info("Unique results collected: %d", len(results))
+        return {"search_results": results, "search_warnings": warnings, "current_step": "synthesise_and_followup"}
     except Exception as e:
-        print(f"   ❌ Error: {e}")
-        return {**state, "errors": state.get("errors", []) + [f"search_executor: {e}"], "current_step": "error"}
+        logger.error("❌ search_executor failed: %s", e)
+        return {"errors": state.get("errors", []) + [f"search_executor: {e}"], "current_step": "error"}
 
 
-def content_synthesiser(state: ResearchState) -> ResearchState:
-    print("\n📝 STEP 3: Synthesizing Content")
-    print(f"   Processing {len(state['search_results'])} search results")
-    
-    sys = (
-        "You synthesise multiple sources into a clear, cited answer. "
-        "Highlight key insights."
-    )
-    parser = PydanticOutputParser(pydantic_object=ResearchSummary)
+async def synthesise_and_followup(state: ResearchState) -> ResearchState:
+    logger.info("📝 STEP 3: Synthesizing Content and Follow-up Questions")
+    logger.debug("Processing %d search results", len(state["search_results"]))
 
+    # One compact line per source; URLs go in a separate trailing list
+    sources = state["search_results"]
     formatted = "\n".join(
-        f"Source {i+1}: {r['title']}\nURL: {r['url']}\nContent: {r['content']}\n"
-        for i, r in enumerate(state["search_results"])
+        f"[{i}] {r.title}: {(r.content or '')[:MAX_SNIPPET_CHARS]}"
+        for i, r in enumerate(sources, 1)
     )
+    urls = "\n".join(f"[{i}] {r.url}" for i, r in enumerate(sources, 1))
 
     prompt = (
         f"User question: {state['user_query']}\n\n"
         f"Search results:\n{formatted}\n\n"
-        f"{parser.get_format_instructions()}"
+        f"URLS:\n{urls}\n\n"
+        f"Generate EXACTLY 2 follow-up questions."
     )
 
-    msg = [SystemMessage(content=sys), HumanMessage(content=prompt)]
+    msg = [_SYNTH_SYS, HumanMessage(content=prompt)]
     try:
-        print("   Generating research summary...")
-        resp = LLM.invoke(msg)
-        summary = parser.parse(resp.content)
-        print("   ✅ Summary generated successfully")
-        print(f"   Summary length: {len(summary.summary)} characters")
-        return {
-            **state,
-            "research_summary": summary.summary,
-            "current_step": "follow_up_generator",
-        }
-    except Exception as e:
-        print(f"   ❌ Error: {e}")
-        return {**state, "errors": state.get("errors", []) + [f"content_synthesiser: {e}"], "current_step": "error"}
-
-
-def follow_up_generator(state: ResearchState) -> ResearchState:
-    print("\n💡 STEP 4: Generating Follow-up Questions")
-    
-    sys = (
-        "Generate EXACTLY 2 thoughtful follow‑up questions that would deepen the user's "
-        "understanding or cover uncovered aspects. Be concise."
-    )
-    parser = PydanticOutputParser(pydantic_object=FollowUpQuestions)
-
-    prompt = (
-        f"Original question: {state['user_query']}\n\n"
-        f"Research summary: {state['research_summary']}\n\n"
-        f"Generate EXACTLY 2 follow-up questions.\n\n"
-        f"{parser.get_format_instructions()}"
-    )
-
-    msg = [SystemMessage(content=sys), HumanMessage(content=prompt)]
-    try:
-        print("   Generating follow-up questions...")
-        resp = LLM.invoke(msg)
-        questions = parser.parse(resp.content).questions[:2]  # Ensure only 2 questions
-        print(f"   Generated {len(questions)} follow-up questions:")
+        logger.debug("Generating research summary and follow-up questions...")
+        result = await _SYNTH_LLM.ainvoke(msg)
+        questions = result.follow_up_questions[:2]  # Ensure only 2 questions
+        logger.info("✅ Summary generated (%d characters)", len(result.summary))
+        logger.info("Generated %d follow-up questions", len(questions))
         for i, q in enumerate(questions, 1):
-            print(f"     {i}. {q.question}")
+            logger.debug("  %d. %s", i, q.question)
         return {
-            **state,
+            "research_summary": result.summary,
             "follow_up_questions": [q.question for q in questions],
             "current_step": "complete",
         }
     except Exception as e:
-        print(f"   ❌ Error: {e}")
-        return {**state, "errors": state.get("errors", []) + [f"follow_up_generator: {e}"], "current_step": "error"}
+        logger.error("❌ synthesise_and_followup failed: %s", e)
+        return {"errors": state.get("errors", []) + [f"synthesise_and_followup: {e}"], "current_step": "error"}
 
 
 def error_handler(state: ResearchState) -> ResearchState:
-    print("Error(s) encountered:", *state.get("errors", []), sep="\n  – ")
-    return {**state, "current_step": "complete"}
+    logger.warning("Error(s) encountered: %s", "; ".join(state.get("errors", [])))
+    return {"current_step": "complete"}
 
 
 def build_graph():
@@ -214,8 +363,7 @@ def build_graph():
 
     g.add_node("query_analyser", query_analyser)
     g.add_node("search_executor", search_executor)
-    g.add_node("content_synthesiser", content_synthesiser)
-    g.add_node("follow_up_generator", follow_up_generator)
+    g.add_node("synthesise_and_followup", synthesise_and_followup)
     g.add_node("error", error_handler)
 
     g.add_conditional_edges("query_analyser", lambda s: s["current_step"], {
@@ -223,14 +371,10 @@ def build_graph():
         "error": "error",
     })
     g.add_conditional_edges("search_executor", lambda s: s["current_step"], {
-        "content_synthesiser": "content_synthesiser",
-        "error": "error",
-    })
-    g.add_conditional_edges("content_synthesiser", lambda s: s["current_step"], {
-        "follow_up_generator": "follow_up_generator",
+        "synthesise_and_followup": "synthesise_and_followup",
         "error": "error",
     })
-    g.add_conditional_edges("follow_up_generator", lambda s: s["current_step"], {
+    g.add_conditional_edges("synthesise_and_followup", lambda s: s["current_step"], {
         "complete": END,
         "error": "error",
     })
@@ -240,12 +384,28 @@ def build_graph():
     return g.compile()
 
 
-def run_research_workflow(question: str) -> Dict:
-    print("\n" + "="*60)
-    print("🚀 STARTING RESEARCH WORKFLOW")
-    print("="*60)
-    print(f"Question: {question}")
-    print("="*60)
+# The graph is static; compile it once. A compiled graph keeps no per-run
+# state, so concurrent invocations can share it safely.
+_COMPILED_GRAPH = build_graph()
+
+
+# Whole-workflow results keyed by normalised question, so repeat questions skip the graph
+_WORKFLOW_CACHE = TTLCache(maxsize=256, ttl=6 * 3600)
+_WORKFLOW_CACHE_LOCK = threading.Lock()
+
+
+async def stream_research_workflow(question: str) -> AsyncIterator[Tuple[str, object]]:
+    """Run the workflow, yielding ("summary", partial_text) while the synthesis
+    streams and finally ("result", result_dict)."""
+    cache_key = question.strip().lower()
+    with _WORKFLOW_CACHE_LOCK:
+        cached = _WORKFLOW_CACHE.get(cache_key)
+    if cached is not None:
+        logger.info("♻️  Returning cached result for: %s", question)
+        yield "result", cached
+        return
+
+    logger.info("🚀 STARTING RESEARCH WORKFLOW: %s", question)
     
     initial_state: ResearchState = {
         "user_query": question,
@@ -255,46 +415,73 @@ def run_research_workflow(question: str) -> Dict:
         "follow_up_questions": [],
         "current_step": "query_analyser",
         "errors": [],
+        "search_warnings": [],
     }
 
-    wf = build_graph()
-
-    # Don't use both stream and invoke - just use invoke
-    final_state = wf.invoke(initial_state)
+    wf = _COMPILED_GRAPH
+
+    # "messages" streams LLM tokens from inside the nodes, "values" carries the full state
+    final_state = initial_state
+    tool_args = ""
+    last_summary = ""
+    async for mode, chunk in wf.astream(initial_state, stream_mode=["messages", "values"]):
+        if mode == "values":
+            final_state = chunk
+            continue
+
+        message, metadata = chunk
+        if metadata.get("langgraph_node") != "synthesise_and_followup":
+            continue
+        # The structured output arrives as function-call argument fragments;
+        # parse the JSON received so far to surface the summary as it grows
+        for tool_chunk in getattr(message, "tool_call_chunks", None) or []:
+            tool_args += tool_chunk.get("args") or ""
+        partial = parse_partial_json(tool_args) if tool_args else None
+        # Later chunks fill the other fields; only push an update when the summary grew
+        if isinstance(partial, dict) and partial.get("summary") and partial["summary"] != last_summary:
+            last_summary = partial["summary"]
+            yield "summary", last_summary
     
-    print("\n" + "="*60)
-    print("✅ WORKFLOW COMPLETED")
-    print("="*60)
     if final_state["errors"]:
-        print("⚠️  Errors encountered during workflow:")
-        for e in final_state["errors"]:
-            print(f"   - {e}")
+        logger.warning("⚠️  Workflow completed with %d error(s)", len(final_state["errors"]))
     else:
-        print("✨ No errors - workflow completed successfully!")
-    print("="*60 + "\n")
+        logger.info("✅ Workflow completed successfully")
 
-    return {
+    result = {
         "original_query": final_state["user_query"],
         "search_queries": final_state["search_queries"],
         "research_summary": final_state["research_summary"],
         "follow_up_questions": final_state["follow_up_questions"],
         "errors": final_state["errors"],
-        "progress": []  # Removed streaming to avoid duplicate execution
+        "search_warnings": final_state["search_warnings"],
     }
+    if not result["errors"] and not result["search_warnings"]:
+        with _WORKFLOW_CACHE_LOCK:
+            _WORKFLOW_CACHE[cache_key] = result
+    yield "result", result
 
 
 # Gradio App Functions
-def process_query(query, history):
-    """Process the research query and return formatted results"""
+async def process_query(query, history):
+    """Process the research query, streaming the summary into the chat as it is generated"""
     if not query.strip():
-        return "", history, gr.update(visible=False), "", gr.update(value=None)
+        yield "", history, gr.update(visible=False), "", gr.update(value=None)
+        return
     
     # Show processing status
     history.append(("User", query))
+    history.append(("Assistant", "⏳ Researching..."))
+    yield "", history, gr.update(visible=False), [], gr.update(value=None)
     
     try:
         # Run the research workflow
-        result = run_research_workflow(query)
+        result = None
+        async for kind, payload in stream_research_workflow(query):
+            if kind == "summary":
+                history[-1] = ("Assistant", f"## 📊 Research Summary\n\n{payload}")
+                yield "", history, gr.update(visible=False), [], gr.update(value=None)
+            else:
+                result = payload
         
         # Format the response
         response = f"## 📊 Research Summary\n\n{result['research_summary']}\n\n"
@@ -313,18 +500,25 @@ def process_query(query, history):
                 response += f"- {e}\n"
             response += "\n"
         
-        history.append(("Assistant", response))
+        # Add searches that failed without stopping the workflow
+        if result['search_warnings']:
+            response += "### ⚠️ Search Warnings:\n"
+            for w in result['search_warnings']:
+                response += f"- {w}\n"
+            response += "\n"
+        
+        history[-1] = ("Assistant", response)
         
         # Create follow-up questions buttons
         if result['follow_up_questions']:
-            return "", history, gr.update(visible=True, value=result['follow_up_questions']), result['follow_up_questions'], gr.update(value=None)
+            yield "", history, gr.update(visible=True, value=result['follow_up_questions']), result['follow_up_questions'], gr.update(value=None)
         else:
-            return "", history, gr.update(visible=False), [], gr.update(value=None)
+            yield "", history, gr.update(visible=False), [], gr.update(value=None)
             
     except Exception as e:
         error_msg = f"❌ An error occurred: {str(e)}"
-        history.append(("Assistant", error_msg))
-        return "", history, gr.update(visible=False), [], gr.update(value=None)
+        history[-1] = ("Assistant", error_msg)
+        yield "", history, gr.update(visible=False), [], gr.update(value=None)
 
 
 def use_follow_up(question, current_questions):
@@ -380,13 +574,19 @@ with gr.Blocks(theme=gr.themes.Soft()) as app:
     submit_btn.click(
         process_query,
         inputs=[query_input, chatbot],
-        outputs=[query_input, chatbot, follow_up_section, current_questions, follow_up_btns]
+        outputs=[query_input, chatbot, follow_up_section, current_questions, follow_up_btns],
+        queue=True,
+        concurrency_limit=8,
+        concurrency_id="research"
     )
     
     query_input.submit(
         process_query,
         inputs=[query_input, chatbot],
-        outputs=[query_input, chatbot, follow_up_section, current_questions, follow_up_btns]
+        outputs=[query_input, chatbot, follow_up_section, current_questions, follow_up_btns],
+        queue=True,
+        concurrency_limit=8,
+        concurrency_id="research"
     )
     
     # Update follow-up buttons when questions are available
@@ -407,7 +607,10 @@ with gr.Blocks(theme=gr.themes.Soft()) as app:
     ).then(
         process_query,
         inputs=[query_input, chatbot],
-        outputs=[query_input, chatbot, follow_up_section, current_questions]
+        outputs=[query_input, chatbot, follow_up_section, current_questions, follow_up_btns],
+        queue=True,
+        concurrency_limit=8,
+        concurrency_id="research"
     )
     
     # Clear history
@@ -433,6 +636,8 @@ if __name__ == "__main__":
     print("📍 Access the app at: http://localhost:7860")
     print("💡 Press CTRL+C to stop the server\n")
     
+    # Research is I/O-bound, so let several requests overlap while capping the backlog
+    app.queue(default_concurrency_limit=8, max_size=32)
     app.launch(
         share=False,
         server_name="0.0.0.0",